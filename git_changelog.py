@@ -8,57 +8,270 @@ Supports various output formats and filtering options.
 """
 
 import argparse
+import io
 import subprocess
 import sys
 import re
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-class GitChangelogGenerator:
-    def __init__(self):
-        self.commit_types = {
-            'feat': '✨ Features',
-            'fix': '🐛 Bug Fixes',
-            'docs': '📚 Documentation',
-            'style': '💄 Styles',
-            'refactor': '♻️ Code Refactoring',
-            'perf': '⚡ Performance Improvements',
-            'test': '🧪 Tests',
-            'chore': '🔧 Chores',
-            'ci': '👷 CI/CD',
-            'build': '📦 Build System',
-            'revert': '⏪ Reverts'
-        }
-
-    def run_git_command(self, command: List[str]) -> str:
-        """Run a git command and return the output."""
+
+# Conventional commit prefix, e.g. "feat(scope): "
+_CONV_RE = re.compile(r'^(\w+)(?:\([^)]+\))?\s*:\s*')
+
+# Keyword fallback for non-conventional subjects, in priority order (a
+# subject mentioning both "add" and "fix" is a fix). Plain substring tests
+# against this table beat a regex alternation, which CPython's engine has
+# to retry at every position of the subject.
+_KEYWORDS = (
+    ('fix', ('fix', 'bug', 'patch')),
+    ('feat', ('feat', 'add', 'implement')),
+    ('docs', ('doc', 'readme')),
+    ('test', ('test', 'spec')),
+    ('refactor', ('refactor', 'restructure')),
+    ('style', ('style', 'format')),
+    ('perf', ('perf', 'optimize')),
+    ('chore', ('chore', 'update', 'bump'))
+)
+
+# Output is written in many small pieces, so buffer it well beyond stdio's
+# default to keep the number of write syscalls low
+_OUTPUT_BUFFER_SIZE = 1 << 20
+
+COMMIT_TYPES = {
+    'feat': '✨ Features',
+    'fix': '🐛 Bug Fixes',
+    'docs': '📚 Documentation',
+    'style': '💄 Styles',
+    'refactor': '♻️ Code Refactoring',
+    'perf': '⚡ Performance Improvements',
+    'test': '🧪 Tests',
+    'chore': '🔧 Chores',
+    'ci': '👷 CI/CD',
+    'build': '📦 Build System',
+    'revert': '⏪ Reverts'
+}
+
+# Markdown sections as (category, heading), ordered by importance
+_ORDERED_CATEGORIES = [
+    (category, COMMIT_TYPES.get(category, category.title()))
+    for category in ['feat', 'fix', 'perf', 'refactor', 'docs', 'style', 'test', 'chore', 'ci', 'build', 'revert', 'other']
+]
+
+
+def categorize_commit(subject: str) -> Tuple[str, int]:
+    """Categorize a commit subject based on conventional commits or keywords.
+
+    Returns the category and the offset where the description starts
+    in the subject, i.e. past any "type(scope): " prefix.
+    """
+    # Check for conventional commits format; only the type token needs
+    # lowercasing here, the full subject is lowered for the fallback
+    match = _CONV_RE.match(subject)
+    offset = match.end() if match else 0
+    if match:
+        commit_type = match.group(1).lower()
+        if commit_type in COMMIT_TYPES:
+            return commit_type, offset
+    
+    # Fallback to keyword detection
+    subject = subject.lower()
+    for category, keywords in _KEYWORDS:
+        for keyword in keywords:
+            if keyword in subject:
+                return category, offset
+    return 'other', offset
+
+
+@dataclass
+class Commit:
+    """A commit parsed from git log."""
+    # Slots keep per-commit memory well below a dict's on large histories
+    __slots__ = ('hash', 'subject', 'author', 'date', 'timestamp', 'refs', 'body')
+
+    hash: str
+    subject: str
+    author: str
+    date: str
+    timestamp: Optional[int]
+    refs: List[str]
+    body: str
+
+    def to_dict(self) -> Dict:
+        """Return the commit as a dict, omitting timestamp when not collected."""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        if self.timestamp is None:
+            del data['timestamp']
+        return data
+
+
+def _first_body_line(body: str) -> str:
+    """Return the first non-blank line of a commit body, stripped."""
+    return next((line.strip() for line in body.split('\n') if line.strip()), '')
+
+
+# Object ids and types as reported in `git cat-file --batch` headers
+_OBJECT_ID_RE = re.compile(rb'[0-9a-f]{40}|[0-9a-f]{64}')
+_OBJECT_TYPES = {b'blob', b'tree', b'commit', b'tag'}
+
+
+class GitSession:
+    """Long-running ``git cat-file --batch`` process for repeated object lookups.
+
+    Spawning git once per lookup is dominated by process startup, so
+    scripts that need many objects should read them through one session:
+
+        with GitSession() as git:
+            message = git.cat_file('HEAD')
+    """
+
+    def __init__(self, cwd: Optional[str] = None):
+        self.cwd = cwd
+        self.proc = None
+        self._stderr = None
+
+    def __enter__(self) -> 'GitSession':
+        # stderr is kept so a session git refused to start (e.g. outside a
+        # repository) can be reported instead of looking like missing objects
+        self._stderr = tempfile.TemporaryFile()
+        self.proc = subprocess.Popen(
+            ['git', 'cat-file', '--batch'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self._stderr,
+            cwd=self.cwd
+        )
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.proc.stdout.close()
+        self.proc.wait()
+        self._stderr.close()
+        self.proc = None
+        self._stderr = None
+
+    def _raise_exited(self) -> None:
+        """Raise CalledProcessError with git's stderr once git has exited."""
+        returncode = self.proc.wait()
+        self._stderr.seek(0)
+        stderr = self._stderr.read().decode('utf-8', 'replace')
+        raise subprocess.CalledProcessError(returncode, self.proc.args, stderr=stderr)
+
+    def cat_file(self, rev: str) -> Optional[bytes]:
+        """Return the raw contents of the object rev names, or None if missing.
+
+        Raises subprocess.CalledProcessError if git has exited, e.g. because
+        the session was started outside a repository.
+        """
+        if self.proc is None:
+            raise RuntimeError("GitSession.cat_file must be called inside a 'with GitSession()' block")
+        # git reads one rev per line, so a newline would queue a second
+        # request whose reply we'd never read
+        if '\n' in rev:
+            raise ValueError(f"Invalid rev {rev!r}: revs must not contain newlines")
         try:
-            result = subprocess.run(
+            self.proc.stdin.write(rev.encode('utf-8') + b'\n')
+            self.proc.stdin.flush()
+        except BrokenPipeError:
+            self._raise_exited()
+        line = self.proc.stdout.readline()
+        if not line.endswith(b'\n'):
+            # EOF or a truncated header: git has exited rather than replied
+            self._raise_exited()
+        # Header is "<sha> <type> <size>"; anything else ("<rev> missing",
+        # "<rev> ambiguous", ...) means there is no object body to read
+        header = line.rstrip(b'\n').split(b' ')
+        if (len(header) != 3 or not _OBJECT_ID_RE.fullmatch(header[0])
+                or header[1] not in _OBJECT_TYPES or not header[2].isdigit()):
+            return None
+        content = self.proc.stdout.read(int(header[2]))
+        self.proc.stdout.read(1)  # trailing newline
+        return content
+
+
+class GitChangelogGenerator:
+    def _iter_git_records(self, command: List[str], separator: bytes = b'\x00') -> Iterator[str]:
+        """Run a git command and yield its output split on a record separator."""
+        # stderr goes to a temp file rather than a pipe: nothing reads it
+        # until stdout is exhausted, so a pipe could fill up and block git
+        with tempfile.TemporaryFile() as stderr_file:
+            proc = subprocess.Popen(
                 ['git'] + command,
-                capture_output=True,
-                text=True,
-                check=True
+                stdout=subprocess.PIPE,
+                stderr=stderr_file
             )
-            return result.stdout.strip()
-        except subprocess.CalledProcessError as e:
+            finished = False
+            try:
+                buffer = bytearray()
+                for chunk in iter(lambda: proc.stdout.read(65536), b''):
+                    # Only the new chunk (plus a possible partial separator)
+                    # needs searching; consumed records are dropped from the
+                    # front so large records aren't copied once per chunk
+                    start = max(len(buffer) - len(separator) + 1, 0)
+                    buffer += chunk
+                    consumed = 0
+                    end = buffer.find(separator, start)
+                    while end != -1:
+                        yield buffer[consumed:end].decode('utf-8', 'replace')
+                        consumed = end + len(separator)
+                        end = buffer.find(separator, consumed)
+                    del buffer[:consumed]
+                if buffer:
+                    yield buffer.decode('utf-8', 'replace')
+                finished = True
+            finally:
+                # If the consumer stopped early (break, close() or an
+                # exception), git may still be blocked writing to the pipe,
+                # so kill it before reaping
+                proc.stdout.close()
+                if not finished and proc.poll() is None:
+                    proc.kill()
+                returncode = proc.wait()
+            stderr_file.seek(0)
+            stderr = stderr_file.read().decode('utf-8', 'replace')
+        if returncode != 0:
+            e = subprocess.CalledProcessError(proc.returncode, proc.args, stderr=stderr)
             print(f"Error running git command: {e}", file=sys.stderr)
+            if stderr:
+                print(stderr.strip(), file=sys.stderr)
             sys.exit(1)
 
-    def get_commits(self, since: Optional[str] = None, until: Optional[str] = None, 
-                   branch: str = 'HEAD', max_count: Optional[int] = None, range_arg: Optional[str] = None, include_time: bool = False) -> List[Dict]:
-        """Get commits from git log with specified filters or range."""
-        # Choose format based on whether to include time
+    def iter_commits(self, since: Optional[str] = None, until: Optional[str] = None,
+                     branch: str = 'HEAD', max_count: Optional[int] = None, range_arg: Optional[str] = None, include_time: bool = False,
+                     include_merges: bool = False) -> Iterator[Commit]:
+        """Yield commits from git log as they are parsed."""
+        # With -z git separates commits with a NUL, and fields are
+        # delimited by unit separators, so '|' or newlines in subjects and
+        # bodies can't be confused with the field layout. Everything needed
+        # (including ref names) comes from this one git log call; add new
+        # metadata here rather than spawning extra git commands.
         if include_time:
-            format_str = '%H|%s|%an|%ad|%at|%b'
+            format_str = '%H%x1f%s%x1f%an%x1f%ad%x1f%at%x1f%D%x1f%b'
         else:
-            format_str = '%H|%s|%an|%ad|%b'
+            format_str = '%H%x1f%s%x1f%an%x1f%ad%x1f%D%x1f%b'
         date_format = '--date=short'
+        
+        cmd = ['log', '-z', f'--pretty=format:{format_str}', date_format]
+        if not include_merges:
+            cmd.append('--no-merges')
             
         if range_arg:
-            cmd = ['log', f'--pretty=format:{format_str}', date_format, range_arg]
+            cmd.append(range_arg)
         else:
-            cmd = ['log', f'--pretty=format:{format_str}', date_format]
             if since:
                 cmd.extend(['--since', since])
             if until:
@@ -67,133 +280,100 @@ class GitChangelogGenerator:
                 cmd.extend(['-n', str(max_count)])
             cmd.append(branch)
         
-        output = self.run_git_command(cmd)
-        commits = []
-        
-        current_commit = None
-        for line in output.split('\n'):
-            if '|' in line and len(line.split('|')) >= 4:
-                if current_commit:
-                    commits.append(current_commit)
-                
-                if include_time:
-                    # Format: hash|subject|author|date|timestamp|body
-                    parts = line.split('|', 5)
-                    current_commit = {
-                        'hash': parts[0],
-                        'subject': parts[1],
-                        'author': parts[2],
-                        'date': parts[3],
-                        'timestamp': int(parts[4]) if parts[4] else None,
-                        'body': parts[5] if len(parts) > 5 else ''
-                    }
-                else:
-                    # Format: hash|subject|author|date|body
-                    parts = line.split('|', 4)
-                    current_commit = {
-                        'hash': parts[0],
-                        'subject': parts[1],
-                        'author': parts[2],
-                        'date': parts[3],
-                        'body': parts[4] if len(parts) > 4 else ''
-                    }
-            elif current_commit and line.strip():
-                current_commit['body'] += '\n' + line
-        
-        if current_commit:
-            commits.append(current_commit)
-            
-        return commits
+        # Authors and short dates repeat across many commits, so share one
+        # string object per distinct value
+        intern = sys.intern
+        for record in self._iter_git_records(cmd):
+            if include_time:
+                # Format: hash, subject, author, date, timestamp, refs, body
+                parts = record.split('\x1f', 6)
+                yield Commit(
+                    hash=parts[0],
+                    subject=parts[1],
+                    author=intern(parts[2]),
+                    date=intern(parts[3]),
+                    timestamp=int(parts[4]) if parts[4] else None,
+                    refs=parts[5].split(', ') if parts[5] else [],
+                    body=parts[6].strip()
+                )
+            else:
+                # Format: hash, subject, author, date, refs, body
+                parts = record.split('\x1f', 5)
+                yield Commit(
+                    hash=parts[0],
+                    subject=parts[1],
+                    author=intern(parts[2]),
+                    date=intern(parts[3]),
+                    timestamp=None,
+                    refs=parts[4].split(', ') if parts[4] else [],
+                    body=parts[5].strip()
+                )
 
-    def categorize_commit(self, commit: Dict) -> str:
-        """Categorize a commit based on conventional commits or keywords."""
-        subject = commit['subject'].lower()
-        
-        # Check for conventional commits format
-        match = re.match(r'^(\w+)(\(.+\))?\s*:\s*(.+)', subject)
-        if match:
-            commit_type = match.group(1)
-            if commit_type in self.commit_types:
-                return commit_type
-        
-        # Fallback to keyword detection
-        if any(keyword in subject for keyword in ['fix', 'bug', 'patch']):
-            return 'fix'
-        elif any(keyword in subject for keyword in ['feat', 'add', 'implement']):
-            return 'feat'
-        elif any(keyword in subject for keyword in ['doc', 'readme']):
-            return 'docs'
-        elif any(keyword in subject for keyword in ['test', 'spec']):
-            return 'test'
-        elif any(keyword in subject for keyword in ['refactor', 'restructure']):
-            return 'refactor'
-        elif any(keyword in subject for keyword in ['style', 'format']):
-            return 'style'
-        elif any(keyword in subject for keyword in ['perf', 'optimize']):
-            return 'perf'
-        elif any(keyword in subject for keyword in ['chore', 'update', 'bump']):
-            return 'chore'
-        else:
-            return 'other'
+    def get_commits(self, since: Optional[str] = None, until: Optional[str] = None, 
+                   branch: str = 'HEAD', max_count: Optional[int] = None, range_arg: Optional[str] = None, include_time: bool = False,
+                   include_merges: bool = False) -> List[Commit]:
+        """Get commits from git log with specified filters or range."""
+        return list(self.iter_commits(since, until, branch, max_count, range_arg, include_time, include_merges))
+
+    def categorize_commit(self, commit: Commit) -> Tuple[str, int]:
+        """Categorize a commit; see the module-level categorize_commit."""
+        return categorize_commit(commit.subject)
 
-    def generate_markdown(self, commits: List[Dict], title: str = "Changelog") -> str:
-        """Generate a markdown changelog."""
-        categorized = {}
+    def write_markdown(self, commits: List[Commit], file: TextIO, title: str = "Changelog") -> None:
+        """Write a markdown changelog to file."""
+        write = file.write
+        categorized = defaultdict(list)
         
         for commit in commits:
-            category = self.categorize_commit(commit)
-            if category not in categorized:
-                categorized[category] = []
-            categorized[category].append(commit)
-        
-        markdown = f"# {title}\n\n"
-        markdown += f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+            category, offset = categorize_commit(commit.subject)
+            categorized[category].append((commit, offset))
         
-        # Order categories by importance
-        category_order = ['feat', 'fix', 'perf', 'refactor', 'docs', 'style', 'test', 'chore', 'ci', 'build', 'revert', 'other']
+        write(f"# {title}\n\n")
+        write(f"Generated on {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
         
-        for category in category_order:
+        for category, category_name in _ORDERED_CATEGORIES:
             if category in categorized:
-                category_name = self.commit_types.get(category, category.title())
-                markdown += f"## {category_name}\n\n"
+                write(f"## {category_name}\n\n")
                 
-                for commit in categorized[category]:
-                    # Clean up the subject
-                    subject = commit['subject']
-                    if ':' in subject:
-                        subject = subject.split(':', 1)[1].strip()
+                for commit, offset in categorized[category]:
+                    # Drop the conventional commit prefix
+                    subject = commit.subject[offset:]
+                    commit_hash = commit.hash
                     
-                    markdown += f"- {subject} ([{commit['hash'][:8]}](../../commit/{commit['hash']}))\n"
-                    if commit['body'].strip():
-                        # Add body on the second line with proper markdown line break
-                        body_lines = [line.strip() for line in commit['body'].split('\n') if line.strip()]
-                        if body_lines:
-                            markdown += f"\n  {body_lines[0]}\n"
+                    write(f"- {subject} ([{commit_hash[:8]}](../../commit/{commit_hash}))\n")
+                    # Add body on the second line with proper markdown line break
+                    body_line = _first_body_line(commit.body)
+                    if body_line:
+                        write(f"\n  {body_line}\n")
                 
-                markdown += "\n"
-        
-        return markdown
+                write("\n")
 
-    def generate_simple_list(self, commits: List[Dict]) -> str:
-        """Generate a simple text list of changes."""
-        output = f"Changes ({len(commits)} commits)\n"
-        output += "=" * 50 + "\n\n"
+    def write_simple_list(self, commits: List[Commit], file: TextIO) -> None:
+        """Write a simple text list of changes to file."""
+        write = file.write
+        write(f"Changes ({len(commits)} commits)\n")
+        write("=" * 50 + "\n\n")
         
         for commit in commits:
-            output += f"• {commit['subject']}\n"
-            output += f"  Author: {commit['author']} | Date: {commit['date']} | Hash: {commit['hash'][:8]}\n"
-            if commit['body'].strip():
-                body_lines = [line.strip() for line in commit['body'].split('\n') if line.strip()]
-                if body_lines:
-                    output += f"  {body_lines[0]}\n"
-            output += "\n"
-        
-        return output
+            write(f"• {commit.subject}\n")
+            write(f"  Author: {commit.author} | Date: {commit.date} | Hash: {commit.hash[:8]}\n")
+            body_line = _first_body_line(commit.body)
+            if body_line:
+                write(f"  {body_line}\n")
+            write("\n")
 
-    def generate_json(self, commits: List[Dict]) -> str:
-        """Generate JSON output of commits."""
-        import json
-        return json.dumps(commits, indent=2)
+    def write_json(self, commits: List[Commit], file: TextIO) -> None:
+        """Write JSON output of commits to file."""
+        data = [commit.to_dict() for commit in commits]
+        # orjson is optional; it serializes large commit lists much faster.
+        # orjson always writes raw UTF-8, so the fallback disables ASCII
+        # escaping to produce identical output either way.
+        if orjson is not None:
+            file.write(orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8'))
+        else:
+            import json
+            json.dump(data, file, indent=2, ensure_ascii=False)
+        file.write("\n")
 
 
 def main():
@@ -207,6 +387,7 @@ def main():
                        help='Output format (default: markdown)')
     parser.add_argument('--title', default='Changelog', help='Title for the changelog')
     parser.add_argument('--include-time', action='store_true', help='Include timestamp in JSON output')
+    parser.add_argument('--include-merges', action='store_true', help='Include merge commits (skipped by default)')
     parser.add_argument('--output', help='Output file (default: stdout)')
     
     args = parser.parse_args()
@@ -220,28 +401,47 @@ def main():
         branch=args.branch,
         max_count=args.max_count,
         range_arg=args.range_arg,
-        include_time=args.include_time
+        include_time=args.include_time,
+        include_merges=args.include_merges
     )
     
     if not commits:
         print("No commits found matching the criteria.", file=sys.stderr)
         sys.exit(1)
     
-    # Generate output
-    if args.format == 'markdown':
-        output = generator.generate_markdown(commits, args.title)
-    elif args.format == 'simple':
-        output = generator.generate_simple_list(commits)
-    elif args.format == 'json':
-        output = generator.generate_json(commits)
+    def write_output(file: TextIO) -> None:
+        if args.format == 'markdown':
+            generator.write_markdown(commits, file, args.title)
+        elif args.format == 'simple':
+            generator.write_simple_list(commits, file)
+        elif args.format == 'json':
+            generator.write_json(commits, file)
     
     # Write output
     if args.output:
-        with open(args.output, 'w', encoding='utf-8') as f:
-            f.write(output)
+        with open(args.output, 'w', encoding='utf-8', buffering=_OUTPUT_BUFFER_SIZE) as f:
+            write_output(f)
         print(f"Changelog written to {args.output}")
     else:
-        print(output)
+        try:
+            sys.stdout.fileno()
+            stdout_buffer = sys.stdout.buffer
+        except (AttributeError, OSError, ValueError):
+            # stdout has been replaced by an in-memory stream (e.g. when
+            # embedded or under test), so there is no buffer to enlarge
+            write_output(sys.stdout)
+        else:
+            sys.stdout.flush()
+            out = io.TextIOWrapper(
+                io.BufferedWriter(stdout_buffer, buffer_size=_OUTPUT_BUFFER_SIZE),
+                encoding=sys.stdout.encoding,
+                errors=sys.stdout.errors
+            )
+            try:
+                write_output(out)
+            finally:
+                # Flush and unwrap without closing the real stdout
+                out.detach().detach()
 
 
 if __name__ == '__main__':
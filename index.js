@@ -216,6 +216,9 @@ class GitChangelogGenerator {
     if (options.title) {
       args.push('--title', options.title);
     }
+    if (options.includeMerges) {
+      args.push('--include-merges');
+    }
     if (options.output) {
       args.push('--output', options.output);
     }
@@ -66,6 +66,7 @@ describe('GitChangelogGenerator API Tests', () => {
       maxCount: 20,
       format: 'markdown',
       title: 'Release Notes',
+      includeMerges: true,
       output: 'CHANGELOG.md'
     };
     
@@ -83,6 +84,7 @@ describe('GitChangelogGenerator API Tests', () => {
     assert.ok(args.includes('markdown'));
     assert.ok(args.includes('--title'));
     assert.ok(args.includes('Release Notes'));
+    assert.ok(args.includes('--include-merges'));
     assert.ok(args.includes('--output'));
     assert.ok(args.includes('CHANGELOG.md'));
   });
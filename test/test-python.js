@@ -1,6 +1,7 @@
-const { test, describe } = require('node:test');
+const { test, describe, before, after } = require('node:test');
 const assert = require('node:assert');
-const { spawn } = require('child_process');
+const { spawn, spawnSync, execFileSync } = require('child_process');
+const os = require('os');
 const path = require('path');
 const fs = require('fs');
 
@@ -35,6 +36,7 @@ describe('Python Script Tests', () => {
       assert.ok(output.includes('Generate changelog from git log'), 'Help should contain description');
       assert.ok(output.includes('--since'), 'Help should contain --since option');
       assert.ok(output.includes('--format'), 'Help should contain --format option');
+      assert.ok(output.includes('--include-merges'), 'Help should contain --include-merges option');
       done();
     });
 
@@ -316,4 +318,266 @@ describe('Python Script Tests', () => {
       }
     });
   });
-}); 
\ No newline at end of file
+});
+
+describe('Python Module Tests', () => {
+  const packageDir = path.join(__dirname, '..');
+  let repoDir;
+
+  // Build a throwaway repository so tests don't depend on this repo's history
+  before(() => {
+    repoDir = fs.mkdtempSync(path.join(os.tmpdir(), 'git-changelog-test-'));
+    const env = {
+      ...process.env,
+      GIT_AUTHOR_NAME: 'Test Author',
+      GIT_AUTHOR_EMAIL: 'test@example.com',
+      GIT_COMMITTER_NAME: 'Test Author',
+      GIT_COMMITTER_EMAIL: 'test@example.com'
+    };
+    const git = (...args) => execFileSync('git', args, { cwd: repoDir, env, stdio: 'pipe' });
+
+    git('init', '-q', '-b', 'main');
+    fs.writeFileSync(path.join(repoDir, 'a.txt'), 'hello\n');
+    git('add', 'a.txt');
+    git('commit', '-q', '-m', 'feat: initial commit');
+    git('tag', 'v1.0');
+    git('commit', '-q', '--allow-empty', '-m', 'fix: handle a | b in parser',
+      '-m', 'First paragraph\nstill first', '-m', 'Second | paragraph');
+    // Larger than one 64 KiB read from git's stdout (and too long for argv)
+    const longMessage = path.join(repoDir, '.git', 'LONG_MSG');
+    fs.writeFileSync(longMessage, `docs: long body\n\n${'lorem ipsum '.repeat(20000)}\n`);
+    git('commit', '-q', '--allow-empty', '-F', longMessage);
+    git('checkout', '-q', '-b', 'side');
+    git('commit', '-q', '--allow-empty', '-m', 'perf: faster loop');
+    git('checkout', '-q', 'main');
+    git('merge', '-q', '--no-ff', 'side', '-m', "Merge branch 'side'");
+  });
+
+  // Run git_changelog.py in the throwaway repo; returns null if python3 is missing
+  function runScript(args) {
+    const result = spawnSync('python3', [path.join(packageDir, 'git_changelog.py'), ...args], {
+      cwd: repoDir,
+      encoding: 'utf8'
+    });
+    if (result.error && result.error.code === 'ENOENT') {
+      return null;
+    }
+    assert.strictEqual(result.status, 0, `Script failed: ${result.stderr}`);
+    return result.stdout;
+  }
+
+  after(() => {
+    fs.rmSync(repoDir, { recursive: true, force: true });
+  });
+
+  // Run a Python snippet with git_changelog importable; returns null if python3 is missing
+  function runPython(code, cwd) {
+    const result = spawnSync('python3', ['-c', code], {
+      cwd: cwd || packageDir,
+      env: { ...process.env, PYTHONPATH: packageDir, PYTHONIOENCODING: 'utf-8' },
+      encoding: 'utf8'
+    });
+    if (result.error && result.error.code === 'ENOENT') {
+      return null;
+    }
+    assert.strictEqual(result.status, 0, `Python snippet failed: ${result.stderr}`);
+    return result.stdout;
+  }
+
+  test('JSON output should not depend on whether orjson is installed', () => {
+    const output = runPython(String.raw`
+import io
+import git_changelog as g
+
+if g.orjson is None:
+    print('SKIP')
+    raise SystemExit
+commits = [
+    g.Commit('a' * 40, 'feat: unicode \u2728 "quoted" | piped', 'Zo\u00eb \u00dcn\u00efcode', '2024-01-01', None, ['tag: v1.0'], 'First\n\nSecond'),
+    g.Commit('b' * 40, 'fix: plain', 'Ann', '2024-01-02', 1700000000, [], '')
+]
+generator = g.GitChangelogGenerator()
+fast = io.StringIO()
+generator.write_json(commits, fast)
+g.orjson = None
+slow = io.StringIO()
+generator.write_json(commits, slow)
+assert fast.getvalue() == slow.getvalue(), (fast.getvalue(), slow.getvalue())
+print('Zo\u00eb \u00dcn\u00efcode' in slow.getvalue())
+`);
+    if (output === null || output.trim() === 'SKIP') {
+      console.log('Skipping test: python3 or orjson not available');
+      return;
+    }
+    assert.strictEqual(output.trim(), 'True', 'Non-ASCII text should be written unescaped');
+  });
+
+  test('main should write to a replaced in-memory stdout', () => {
+    const output = runPython(String.raw`
+import io
+import sys
+import git_changelog as g
+
+captured = io.StringIO()
+sys.stdout = captured
+sys.argv = ['git_changelog.py', '--max-count', '1', '--format', 'simple']
+try:
+    g.main()
+finally:
+    sys.stdout = sys.__stdout__
+print('Changes (1 commits)' in captured.getvalue())
+`, repoDir);
+    if (output === null) {
+      console.log('Skipping test: python3 not available');
+      return;
+    }
+    assert.strictEqual(output.trim(), 'True', 'Output should go to the replacement stdout');
+  });
+
+  test('GitSession should read objects and stay in sync on bad revs', () => {
+    const output = runPython(String.raw`
+import git_changelog as g
+
+try:
+    g.GitSession().cat_file('HEAD')
+except RuntimeError:
+    print('outside-with: RuntimeError')
+
+with g.GitSession() as git:
+    print('blob:', git.cat_file('HEAD:a.txt'))
+    try:
+        git.cat_file('x\nHEAD')
+    except ValueError:
+        print('newline: ValueError')
+    print('missing:', git.cat_file('nope'))
+    print('missing with spaces:', git.cat_file('HEAD:a missing'))
+    print('after bad revs:', git.cat_file('v1.0:a.txt'))
+git.__exit__(None, None, None)
+g.GitSession().__exit__(None, None, None)
+print('repeated exit: ok')
+`, repoDir);
+    if (output === null) {
+      console.log('Skipping test: python3 not available');
+      return;
+    }
+    assert.deepStrictEqual(output.trim().split('\n'), [
+      'outside-with: RuntimeError',
+      "blob: b'hello\\n'",
+      'newline: ValueError',
+      'missing: None',
+      'missing with spaces: None',
+      "after bad revs: b'hello\\n'",
+      'repeated exit: ok'
+    ]);
+  });
+
+  test('GitSession should raise with git stderr outside a repository', () => {
+    const outsideDir = fs.mkdtempSync(path.join(os.tmpdir(), 'git-changelog-norepo-'));
+    try {
+      const output = runPython(String.raw`
+import os
+import subprocess
+import git_changelog as g
+
+os.environ['GIT_CEILING_DIRECTORIES'] = os.path.dirname(os.getcwd())
+with g.GitSession() as git:
+    try:
+        git.cat_file('HEAD')
+        print('no error')
+    except subprocess.CalledProcessError as e:
+        print('not a git repository' in e.stderr)
+`, outsideDir);
+      if (output === null) {
+        console.log('Skipping test: python3 not available');
+        return;
+      }
+      assert.strictEqual(output.trim(), 'True', 'cat_file should raise with git stderr');
+    } finally {
+      fs.rmSync(outsideDir, { recursive: true, force: true });
+    }
+  });
+
+  test('should skip merge commits unless --include-merges is given', () => {
+    const output = runScript(['--format', 'json']);
+    if (output === null) {
+      console.log('Skipping test: python3 not available');
+      return;
+    }
+    // Commits made within the same second have no fixed log order
+    const subjects = JSON.parse(output).map((commit) => commit.subject).sort();
+    assert.deepStrictEqual(subjects, [
+      'docs: long body',
+      'feat: initial commit',
+      'fix: handle a | b in parser',
+      'perf: faster loop'
+    ]);
+
+    const withMerges = JSON.parse(runScript(['--format', 'json', '--include-merges']));
+    assert.strictEqual(withMerges.length, 5);
+    assert.strictEqual(withMerges[0].subject, "Merge branch 'side'");
+  });
+
+  test('should parse pipes, multi-paragraph and long bodies, and refs', () => {
+    const output = runScript(['--format', 'json', '--include-time']);
+    if (output === null) {
+      console.log('Skipping test: python3 not available');
+      return;
+    }
+    const commits = JSON.parse(output);
+    const bySubject = Object.fromEntries(commits.map((commit) => [commit.subject, commit]));
+
+    const piped = bySubject['fix: handle a | b in parser'];
+    assert.ok(piped, 'Subject containing | should be kept intact');
+    assert.strictEqual(piped.author, 'Test Author');
+    assert.match(piped.date, /^\d{4}-\d{2}-\d{2}$/);
+    assert.strictEqual(typeof piped.timestamp, 'number');
+    assert.strictEqual(piped.body, 'First paragraph\nstill first\n\nSecond | paragraph');
+
+    assert.strictEqual(bySubject['docs: long body'].body, 'lorem ipsum '.repeat(20000).trim());
+    assert.deepStrictEqual(bySubject['feat: initial commit'].refs, ['tag: v1.0']);
+    assert.deepStrictEqual(bySubject['perf: faster loop'].refs, ['side']);
+  });
+
+  test('should render pipes and the first body line in markdown and simple output', () => {
+    const markdown = runScript(['--format', 'markdown']);
+    if (markdown === null) {
+      console.log('Skipping test: python3 not available');
+      return;
+    }
+    assert.ok(markdown.includes('- handle a | b in parser ('), 'Markdown should strip only the type prefix');
+    assert.ok(markdown.includes('\n  First paragraph\n'), 'Markdown should show the first body line');
+    assert.ok(!markdown.includes('Merge branch'), 'Merges should be skipped by default');
+
+    const simple = runScript(['--format', 'simple']);
+    assert.ok(simple.includes('Changes (4 commits)'));
+    assert.ok(simple.includes('• fix: handle a | b in parser\n  Author: Test Author | Date: '));
+  });
+
+  test('closing the commit iterator early should stop and reap git', () => {
+    const output = runPython(String.raw`
+import gc
+import os
+import warnings
+import git_changelog as g
+
+with warnings.catch_warnings(record=True) as caught:
+    warnings.simplefilter('always')
+    commits = g.GitChangelogGenerator().iter_commits()
+    next(commits)
+    commits.close()
+    gc.collect()
+
+try:
+    os.waitpid(-1, os.WNOHANG)
+    print('git left running')
+except ChildProcessError:
+    print('no children')
+print([str(w.message) for w in caught if issubclass(w.category, ResourceWarning)])
+`, repoDir);
+    if (output === null) {
+      console.log('Skipping test: python3 not available');
+      return;
+    }
+    assert.deepStrictEqual(output.trim().split('\n'), ['no children', '[]']);
+  });
+});